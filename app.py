@@ -1,18 +1,21 @@
 import streamlit as st
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from google.cloud import storage
-from PIL import Image
 import io
 from datetime import datetime, date
 import os
 import json
-import uuid
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
-from typing import Optional, Tuple, List
+from typing import TYPE_CHECKING, Optional, Tuple, List
 from dotenv import load_dotenv
 
+# gspread, google-cloud-storage and Pillow are imported where they are used
+# so the page header renders before those heavy packages load
+if TYPE_CHECKING:
+    import gspread
+    from google.cloud import storage
+
 # Load environment variables (for local development)
 load_dotenv()
 
@@ -24,165 +27,264 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Mobile-first, clean styling
-st.markdown("""
-<style>
-    /* Hide Streamlit elements for cleaner mobile UI */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    .stDeployButton {display: none;}
-    
-    /* Mobile-optimized container */
-    .main .block-container {
-        padding-top: 1rem;
-        padding-left: 1rem;
-        padding-right: 1rem;
-        max-width: 100%;
-    }
-    
-    /* Clean header */
-    .main-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 12px;
-        margin-bottom: 1.5rem;
-        text-align: center;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    }
-    .main-header h1 {
-        color: white;
-        margin: 0;
-        font-size: 1.8rem;
-        font-weight: 700;
-        letter-spacing: 0.5px;
-    }
-    .main-header p {
-        color: rgba(255,255,255,0.9);
-        margin: 0.3rem 0 0 0;
-        font-size: 0.9rem;
-    }
-    
-    /* Status indicator */
-    .status-badge {
-        display: inline-flex;
-        align-items: center;
-        padding: 0.4rem 0.8rem;
-        border-radius: 20px;
-        font-size: 0.8rem;
-        font-weight: 600;
-        margin: 0.5rem 0;
-    }
-    .status-connected {
-        background: #d4edda;
-        color: #155724;
-        border: 1px solid #c3e6cb;
-    }
-    .status-error {
-        background: #f8d7da;
-        color: #721c24;
-        border: 1px solid #f5c6cb;
-    }
-    
-    /* Form styling */
-    .form-section {
-        background: white;
-        padding: 1.2rem;
-        border-radius: 12px;
-        margin: 1rem 0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-        border: 1px solid #f0f0f0;
-    }
-    
-    .form-title {
-        font-size: 1.2rem;
-        font-weight: 600;
-        color: #ffff;
-        margin: 0 0 1rem 0;
-        text-align: center;
-    }
-    
-    /* Image upload areas */
-    .upload-area {
-        border: 2px dashed #ddd;
-        border-radius: 8px;
-        padding: 1rem;
-        text-align: center;
-        margin: 0.5rem 0;
-        background: #fafafa;
-    }
-    
-    /* Success/Error messages */
-    .message-box {
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        font-weight: 500;
-    }
-    .success-box {
-        background: #d4edda;
-        color: #155724;
-        border-left: 4px solid #28a745;
-    }
-    .error-box {
-        background: #f8d7da;
-        color: #721c24;
-        border-left: 4px solid #dc3545;
-    }
-    .warning-box {
-        background: #fff3cd;
-        color: #856404;
-        border-left: 4px solid #ffc107;
-    }
-    
-    /* Mobile button styling */
-    .stButton > button {
-        width: 100%;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 0.8rem 1.5rem;
-        border-radius: 8px;
-        font-weight: 600;
-        font-size: 1rem;
-        margin: 0.5rem 0;
-    }
-    
-    /* Checkbox styling */
-    .checkbox-container {
-        background: #f8f9fa;
-        border: 1px solid #dee2e6;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    
-    /* Hide Streamlit file uploader label */
-    .uploadedFile {
-        display: none;
-    }
-    
-    /* Responsive adjustments */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 1.5rem;
-        }
-        .form-section {
-            padding: 1rem;
-        }
-    }
-    
-    @media (max-width: 480px) {
-        .main .block-container {
-            padding-left: 0.5rem;
-            padding-right: 0.5rem;
-        }
-        .form-section {
-            padding: 0.8rem;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+# Mobile-first, clean styling (static/styles.css)
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "styles.css")
+
+@st.cache_data(show_spinner=False)
+def _load_css() -> str:
+    """Read the stylesheet once per process and wrap it for st.markdown"""
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1>📊 MINISO POSM Data Collection</h1>
+    <p>Store Data Collection System</p>
+</div>
+"""
+
+ERROR_BOX_HTML = """
+<div class="message-box error-box">
+    <strong>❌ Please complete:</strong><br>
+    • {items}
+</div>
+"""
+
+SUCCESS_BOX_HTML = """
+<div class="message-box success-box">
+    <strong>{message}</strong><br>
+    {detail}
+</div>
+"""
+
+# Streamlit drops anything not re-emitted on a rerun, so the styles are
+# rendered on every run; only the file read is cached.
+st.markdown(_load_css(), unsafe_allow_html=True)
+
+# Longest side (px) of images stored in GCS
+MAX_IMAGE_DIMENSION = 1920
+PREVIEW_IMAGE_DIMENSION = 640
+
+# One credential object covers both Sheets and Storage
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/cloud-platform"
+]
+
+# HTTPS connections kept per host for GCS: every active session can have two
+# uploads in flight, and requests' default pool (10) discards the extras
+STORAGE_POOL_SIZE = 32
+
+@st.cache_resource(show_spinner=False)
+def _get_google_clients(creds_json: str) -> Tuple["gspread.Client", "storage.Client"]:
+    """Build the gspread and GCS clients once per process and share them across sessions"""
+    import gspread
+    from google.cloud import storage
+    from google.oauth2.service_account import Credentials
+    
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+    
+    creds = Credentials.from_service_account_info(json.loads(creds_json), scopes=GOOGLE_SCOPES)
+    
+    # Same session google-cloud-core would build (300s token refresh timeout),
+    # with a larger pool. mTLS is configured last so a client-certificate
+    # adapter, when enabled, replaces the plain one rather than the reverse
+    storage_session = AuthorizedSession(creds, refresh_timeout=300)
+    storage_session.mount(
+        "https://", HTTPAdapter(pool_connections=STORAGE_POOL_SIZE, pool_maxsize=STORAGE_POOL_SIZE)
+    )
+    storage_session.configure_mtls_channel()
+    
+    # _http is google-cloud-core's private hook for supplying the transport
+    storage_client = storage.Client(credentials=creds, _http=storage_session)
+    return gspread.authorize(creds), storage_client
+
+class _PathCharTable(dict):
+    """str.translate table keeping alphanumerics, space, '-' and '_' (filled lazily per code point)"""
+    
+    def __missing__(self, codepoint: int) -> Optional[str]:
+        char = chr(codepoint)
+        value = char if char.isalnum() or char in ' -_' else None
+        self[codepoint] = value
+        return value
+
+_PATH_CHARS = _PathCharTable()
+
+def _clean_path_segment(name: str) -> str:
+    """Make a store/employee name safe for a GCS folder name"""
+    return name.translate(_PATH_CHARS).strip().replace(' ', '_')
+
+@st.cache_resource(show_spinner=False)
+def _open_worksheets(_gc: "gspread.Client", spreadsheet_id: str) -> Tuple["gspread.Worksheet", "gspread.Worksheet", "gspread.Worksheet"]:
+    """Open the backend spreadsheet once per process and return (main, employee, store) worksheets"""
+    spreadsheet = _gc.open_by_key(spreadsheet_id)
+    # One metadata fetch for all tabs instead of one per worksheet() lookup
+    worksheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+    
+    # Main worksheet (Sheet1) is the first tab
+    main_worksheet = next(iter(worksheets.values()), None)
+    if main_worksheet is None:
+        main_worksheet = spreadsheet.add_worksheet(title="Sheet1", rows="1000", cols="10")
+    
+    # Get or create employee worksheet
+    employee_worksheet = worksheets.get("Employee Sheet")
+    if employee_worksheet is None:
+        employee_worksheet = spreadsheet.add_worksheet(title="Employee Sheet", rows="1000", cols="1")
+        employee_worksheet.append_row(['Employee_Name'])
+    
+    # Get or create store worksheet
+    store_worksheet = worksheets.get("Store Sheet")
+    if store_worksheet is None:
+        store_worksheet = spreadsheet.add_worksheet(title="Store Sheet", rows="1000", cols="1")
+        store_worksheet.append_row(['Store_Name'])
+    
+    return main_worksheet, employee_worksheet, store_worksheet
+
+# Sheets errors worth retrying: rate limit (rejected before it runs) and server errors
+_RETRYABLE_SHEETS_CODES = {429, 500, 502, 503, 504}
+
+def _call_sheets(func, *args, idempotent: bool = True, **kwargs):
+    """Call a gspread method, retrying transient errors with jittered exponential backoff.
+    
+    Non-idempotent calls (appends) only retry 429s - a 5xx may have already written the row.
+    """
+    import gspread
+    from google.api_core.retry import Retry
+    
+    codes = _RETRYABLE_SHEETS_CODES if idempotent else {429}
+    
+    def is_transient(exc: Exception) -> bool:
+        return isinstance(exc, gspread.exceptions.APIError) and exc.code in codes
+    
+    retry = Retry(predicate=is_transient, initial=0.25, maximum=4.0, multiplier=2.0, timeout=20)
+    return retry(func)(*args, **kwargs)
+
+def _as_text(value: str) -> str:
+    """Keep free text literal under USER_ENTERED.
+    
+    The leading apostrophe is hidden by Sheets and forces a text cell, so form input
+    is never parsed as a formula, number ("0123"), date ("7-11") or percentage ("50%").
+    """
+    return f"'{value}" if value else value
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _spreadsheet_modified_time(_spreadsheet: "gspread.Spreadsheet", spreadsheet_id: str) -> Optional[str]:
+    """Drive modifiedTime of the spreadsheet - a ~200 byte freshness probe (None if unavailable)"""
+    try:
+        return _spreadsheet.get_lastUpdateTime()
+    except Exception:
+        return None
+
+def _sheet_version(spreadsheet: "gspread.Spreadsheet") -> str:
+    """Cache key that only changes when the spreadsheet has been modified"""
+    modified_time = _spreadsheet_modified_time(spreadsheet, spreadsheet.id)
+    # Without the Drive API, fall back to refreshing once a minute
+    return modified_time or f"minute-{int(time.time() // 60)}"
+
+# Lookup sheet title for each name column header
+LOOKUP_SHEETS = {"Store_Name": "Store Sheet", "Employee_Name": "Employee Sheet"}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_lookup_names(_spreadsheet: "gspread.Spreadsheet", spreadsheet_id: str, sheet_version: str) -> dict:
+    """Read column A of every lookup sheet in one values.batchGet; unique, sorted names per header"""
+    headers = list(LOOKUP_SHEETS)
+    response = _call_sheets(
+        _spreadsheet.values_batch_get, [f"'{LOOKUP_SHEETS[header]}'!A:A" for header in headers]
+    )
+    names = {}
+    for header, value_range in zip(headers, response.get("valueRanges", [])):
+        values = [row[0] if row else "" for row in value_range.get("values", [])]
+        names[header] = sorted({v for v in values[1:] if v}) if values[:1] == [header] else []
+    return names
+
+def _strip_jpeg_metadata(data: bytes) -> bytes:
+    """Drop APP1 segments (EXIF and XMP: GPS position, device serials) from a JPEG without decoding it"""
+    kept = [data[:2]]  # SOI
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:  # Start of scan: the rest is image data
+            break
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if marker != 0xE1:
+            kept.append(data[pos:end])
+        pos = end
+    kept.append(data[pos:])
+    stripped = b''.join(kept)
+    return data if len(stripped) == len(data) else stripped
+
+def _encode_for_upload(image_data: bytes) -> bytes:
+    """Return upright JPEG bytes whose longest side is at most MAX_IMAGE_DIMENSION"""
+    from PIL import ExifTags, Image, ImageFile, ImageOps
+    # Phone uploads over flaky links are sometimes cut short; keep what decoded
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+    
+    # Opening only parses the header; pixels are decoded on first access
+    image = Image.open(io.BytesIO(image_data))
+    
+    # Already a small, upright JPEG: store its compressed data as uploaded -
+    # decoding and re-encoding would only cost CPU and quality. Objects are
+    # public, so the EXIF/XMP metadata (GPS, device serials) is still dropped
+    if (image.format == 'JPEG' and image.mode in ("RGB", "L")
+            and max(image.size) <= MAX_IMAGE_DIMENSION
+            and image.getexif().get(ExifTags.Base.Orientation, 1) == 1):
+        return _strip_jpeg_metadata(image_data)
+    
+    # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when the photo is far
+    # larger than we keep (no-op for PNG). The precise resize happens below.
+    scale = MAX_IMAGE_DIMENSION / max(image.size)
+    if scale < 1:
+        image.draft('RGB', (max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+    
+    # Auto-orient the image based on EXIF data
+    image = ImageOps.exif_transpose(image)
+    
+    # JPEG only stores RGB/L - flatten alpha, palette, CMYK, etc.
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    
+    # Fit the longest side (portrait or landscape) in one in-place resize.
+    # reducing_gap: integer box-reduce in C first (keeping >= 2x the target),
+    # so the filter only covers the last <2x step, where BICUBIC (4 taps)
+    # looks the same as LANCZOS (6 taps) at a lower cost
+    image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.BICUBIC, reducing_gap=2.0)
+    
+    # Single-pass baseline encode: Huffman optimisation and progressive scans
+    # cost ~6x the CPU for ~12% fewer bytes on a link that is not the bottleneck
+    img_bytes = io.BytesIO()
+    image.save(img_bytes, format='JPEG', quality=85, optimize=False, progressive=False, subsampling='4:2:0')
+    return img_bytes.getvalue()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _preview_image(_image_data: bytes, file_id: str) -> bytes:
+    """Small upright JPEG of an upload for the on-page preview (cached per uploaded file)"""
+    from PIL import Image, ImageFile, ImageOps
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+    
+    image = Image.open(io.BytesIO(_image_data))
+    image.draft('RGB', (PREVIEW_IMAGE_DIMENSION, PREVIEW_IMAGE_DIMENSION))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((PREVIEW_IMAGE_DIMENSION, PREVIEW_IMAGE_DIMENSION), Image.Resampling.BICUBIC, reducing_gap=2.0)
+    
+    preview = io.BytesIO()
+    image.save(preview, format='JPEG', quality=75)
+    return preview.getvalue()
+
+def _run_concurrently(*calls: tuple) -> list:
+    """Run (func, *args) calls in worker threads and return their results in order.
+    
+    The calls must not use st.* - only the script thread can write to the page.
+    """
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(*call) for call in calls]
+        return [future.result() for future in futures]
 
 class YouPosmHandler:
     """You-POSM handler with Google Cloud Secret Manager backend"""
@@ -195,120 +297,113 @@ class YouPosmHandler:
         self.employee_worksheet = None  # Employee sheet for employee data
         self.store_worksheet = None  # Store sheet for store data
         self.connection_status = {"sheets": False, "storage": False}
+        # Names written by this handler, merged into the cached lookup lists so a
+        # new store/employee shows up without re-reading the sheet
+        self.added_names = {'Store_Name': set(), 'Employee_Name': set()}
+        self.object_acls_enabled = True  # False once the bucket rejects object ACLs
+        # (level, message) pairs from setup; rendered by main() since the handler is
+        # built inside st.cache_resource and shared across sessions
+        self.setup_messages: List[Tuple[str, str]] = []
         self._setup_connections()
     
-    def _get_secret(self, secret_name: str, project_id: str) -> Optional[str]:
+    def _notify(self, level: str, message: str):
+        """Record a setup message for main() to show with st.<level>"""
+        self.setup_messages.append((level, message))
+    
+    def _get_secret(self, client, secret_name: str, project_id: str) -> Optional[str]:
         """Get secret from Secret Manager with error handling"""
         try:
-            from google.cloud import secretmanager
-            client = secretmanager.SecretManagerServiceClient()
             name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
             response = client.access_secret_version(request={"name": name})
             return response.payload.data.decode("UTF-8")
         except Exception as e:
-            st.warning(f"Could not get {secret_name} from Secret Manager: {str(e)}")
+            self._notify("warning", f"Could not get {secret_name} from Secret Manager: {str(e)}")
             return None
     
+    def _credentials_from_env(self) -> Optional[dict]:
+        """Service account info from GOOGLE_CREDENTIALS (inline JSON or a file path)"""
+        google_creds_json = os.getenv("GOOGLE_CREDENTIALS")
+        if not google_creds_json:
+            return None
+        try:
+            return json.loads(google_creds_json)
+        except json.JSONDecodeError:
+            # Maybe it's a file path
+            if os.path.exists(google_creds_json):
+                with open(google_creds_json, 'r') as f:
+                    return json.load(f)
+        return None
+    
     def _setup_connections(self):
-        """Setup Google Cloud connections using Secret Manager or environment variables"""
+        """Setup Google Cloud connections using environment variables, then Secret Manager"""
         try:
             # Get project ID from environment or default
             project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "youvit-ai-chatbot")
             
-            # Initialize variables
-            bucket_name = None
-            spreadsheet_id = None
-            creds_dict = None
-            
-            # Try to get configuration from Secret Manager first
-            try:
-                # Get secrets from Secret Manager
-                bucket_name = self._get_secret("youposm-gcs-bucket", project_id)
-                spreadsheet_id = self._get_secret("youposm-spreadsheet-id", project_id)
-                
-                # Get credentials from Secret Manager
-                creds_json = self._get_secret("youposm-google-credentials", project_id)
-                if creds_json:
-                    creds_dict = json.loads(creds_json)
+            # Environment variables first (local development / explicit config);
+            # Secret Manager is only contacted for values they don't provide
+            bucket_name = os.getenv("GCS_BUCKET_NAME")
+            spreadsheet_id = os.getenv("SPREADSHEET_ID")
+            creds_dict = self._credentials_from_env()
+            
+            missing_secrets = [
+                secret_name for secret_name, value in (
+                    ("youposm-gcs-bucket", bucket_name),
+                    ("youposm-spreadsheet-id", spreadsheet_id),
+                    ("youposm-google-credentials", creds_dict)
+                ) if not value
+            ]
+            if missing_secrets:
+                try:
+                    from google.cloud import secretmanager
+                    client = secretmanager.SecretManagerServiceClient()
                     
-            except ImportError:
-                st.info("🔄 Secret Manager not available, using environment variables")
-            except Exception as e:
-                st.info(f"🔄 Secret Manager access failed: {str(e)}, falling back to environment variables")
+                    # One client, independent lookups fetched concurrently
+                    secret_values = dict(zip(missing_secrets, _run_concurrently(
+                        *((self._get_secret, client, secret_name, project_id) for secret_name in missing_secrets)
+                    )))
+                    bucket_name = bucket_name or secret_values.get("youposm-gcs-bucket")
+                    spreadsheet_id = spreadsheet_id or secret_values.get("youposm-spreadsheet-id")
+                    creds_json = secret_values.get("youposm-google-credentials")
+                    if creds_json:
+                        creds_dict = json.loads(creds_json)
+                        
+                except ImportError:
+                    self._notify("info", "🔄 Secret Manager not available, using local configuration")
+                except Exception as e:
+                    self._notify("info", f"🔄 Secret Manager access failed: {str(e)}, using local configuration")
             
-            # Fallback to environment variables if Secret Manager failed
-            if not bucket_name:
-                bucket_name = os.getenv("GCS_BUCKET_NAME")
-            if not spreadsheet_id:
-                spreadsheet_id = os.getenv("SPREADSHEET_ID")
-            if not creds_dict:
-                # Try environment variables for credentials
-                google_creds_json = os.getenv("GOOGLE_CREDENTIALS")
-                if google_creds_json:
-                    try:
-                        creds_dict = json.loads(google_creds_json)
-                    except json.JSONDecodeError:
-                        # Maybe it's a file path
-                        if os.path.exists(google_creds_json):
-                            with open(google_creds_json, 'r') as f:
-                                creds_dict = json.load(f)
-                
-                # Try default credentials.json file (for local development)
-                if not creds_dict and os.path.exists("credentials.json"):
-                    with open("credentials.json", 'r') as f:
-                        creds_dict = json.load(f)
+            # Try default credentials.json file (for local development)
+            if not creds_dict and os.path.exists("credentials.json"):
+                with open("credentials.json", 'r') as f:
+                    creds_dict = json.load(f)
             
             # Validate required configuration
             if not bucket_name:
-                st.error("❌ GCS bucket name not found in Secret Manager or environment variables")
+                self._notify("error", "❌ GCS bucket name not found in Secret Manager or environment variables")
                 return False
                 
             if not spreadsheet_id:
-                st.error("❌ Spreadsheet ID not found in Secret Manager or environment variables")
+                self._notify("error", "❌ Spreadsheet ID not found in Secret Manager or environment variables")
                 return False
             
             if not creds_dict:
-                st.error("❌ Google Cloud credentials not found in Secret Manager, environment variables, or credential files")
+                self._notify("error", "❌ Google Cloud credentials not found in Secret Manager, environment variables, or credential files")
+                return False
+            
+            # Get the shared Sheets and Storage clients (built once per process)
+            try:
+                self.gc, self.storage_client = _get_google_clients(json.dumps(creds_dict, sort_keys=True))
+            except Exception as e:
+                self._notify("error", f"❌ Invalid Google Cloud credentials: {str(e)}")
                 return False
             
             # Setup Google Sheets
             try:
-                sheets_creds = Credentials.from_service_account_info(
-                    creds_dict, 
-                    scopes=[
-                        "https://www.googleapis.com/auth/spreadsheets", 
-                        "https://www.googleapis.com/auth/drive"
-                    ]
+                # Resolve (or create) the three worksheets - shared across sessions
+                self.main_worksheet, self.employee_worksheet, self.store_worksheet = _open_worksheets(
+                    self.gc, spreadsheet_id
                 )
-                self.gc = gspread.authorize(sheets_creds)
-                
-                # Connect to the backend spreadsheet
-                spreadsheet = self.gc.open_by_key(spreadsheet_id)
-                
-                # Get main worksheet (Sheet1)
-                try:
-                    self.main_worksheet = spreadsheet.sheet1
-                except:
-                    # If Sheet1 doesn't exist, create it
-                    self.main_worksheet = spreadsheet.add_worksheet(title="Sheet1", rows="1000", cols="10")
-                
-                # Get or create employee worksheet
-                try:
-                    self.employee_worksheet = spreadsheet.worksheet("Employee Sheet")
-                except:
-                    # Create employee sheet if it doesn't exist
-                    self.employee_worksheet = spreadsheet.add_worksheet(title="Employee Sheet", rows="1000", cols="1")
-                    # Set headers for employee sheet
-                    self.employee_worksheet.append_row(['Employee_Name'])
-                
-                # Get or create store worksheet
-                try:
-                    self.store_worksheet = spreadsheet.worksheet("Store Sheet")
-                except:
-                    # Create store sheet if it doesn't exist
-                    self.store_worksheet = spreadsheet.add_worksheet(title="Store Sheet", rows="1000", cols="1")
-                    # Set headers for store sheet
-                    self.store_worksheet.append_row(['Store_Name'])
                 
                 # Verify sheet structure and create headers if needed
                 self._ensure_sheet_structure()
@@ -316,30 +411,34 @@ class YouPosmHandler:
                 self.connection_status["sheets"] = True
                 
             except Exception as e:
-                st.error(f"❌ Cannot connect to Google Sheets: {str(e)}")
+                self._notify("error", f"❌ Cannot connect to Google Sheets: {str(e)}")
                 self.connection_status["sheets"] = False
             
             # Setup Google Cloud Storage
             try:
-                storage_creds = Credentials.from_service_account_info(
-                    creds_dict, 
-                    scopes=["https://www.googleapis.com/auth/cloud-platform"]
-                )
-                self.storage_client = storage.Client(credentials=storage_creds)
+                # No blocking exists() probe: a bad bucket surfaces on the first upload
                 self.bucket = self.storage_client.bucket(bucket_name)
-                
-                # Test bucket access
-                self.bucket.exists()
                 self.connection_status["storage"] = True
                 
+                # Open the GCS connection in the background so the first upload
+                # doesn't pay for TCP + TLS inline
+                threading.Thread(target=self._warm_storage, daemon=True).start()
+                
             except Exception as e:
-                st.error(f"❌ Cannot connect to storage bucket '{bucket_name}': {str(e)}")
+                self._notify("error", f"❌ Cannot connect to storage bucket '{bucket_name}': {str(e)}")
                 self.connection_status["storage"] = False
                 
         except Exception as e:
-            st.error(f"❌ Setup error: {str(e)}")
+            self._notify("error", f"❌ Setup error: {str(e)}")
             return False
     
+    def _warm_storage(self):
+        """Make one cheap bucket request to prime the storage session (runs off the script thread)"""
+        try:
+            self.bucket.exists()
+        except Exception:
+            pass  # Real problems are reported by upload_image
+    
     def _ensure_sheet_structure(self):
         """Ensure the spreadsheets have the correct headers WITHOUT deleting existing data"""
         try:
@@ -352,7 +451,7 @@ class YouPosmHandler:
             
             # Get current headers for main sheet
             try:
-                current_main_headers = self.main_worksheet.row_values(1)
+                current_main_headers = _call_sheets(self.main_worksheet.row_values, 1)
             except:
                 current_main_headers = []
             
@@ -365,22 +464,22 @@ class YouPosmHandler:
                         # Sheet is truly empty, safe to add headers
                         self.main_worksheet.clear()
                         self.main_worksheet.append_row(main_expected_headers)
-                        st.info("📋 Main spreadsheet headers configured (new sheet)")
+                        self._notify("info", "📋 Main spreadsheet headers configured (new sheet)")
                 except:
                     # If we can't check, don't risk clearing data
-                    st.warning("⚠️ Could not verify main sheet structure - preserving existing data")
+                    self._notify("warning", "⚠️ Could not verify main sheet structure - preserving existing data")
             elif current_main_headers != main_expected_headers:
                 # Headers exist but don't match - LOG but DON'T clear
-                st.warning(f"⚠️ Main sheet headers differ from expected format")
-                st.warning(f"Expected: {main_expected_headers}")
-                st.warning(f"Current: {current_main_headers}")
-                st.info("📌 Continuing with existing headers to preserve data")
+                self._notify("warning", f"⚠️ Main sheet headers differ from expected format")
+                self._notify("warning", f"Expected: {main_expected_headers}")
+                self._notify("warning", f"Current: {current_main_headers}")
+                self._notify("info", "📌 Continuing with existing headers to preserve data")
             
             # Employee sheet headers - SAFE handling
             employee_expected_headers = ['Employee_Name']
             
             try:
-                current_employee_headers = self.employee_worksheet.row_values(1)
+                current_employee_headers = _call_sheets(self.employee_worksheet.row_values, 1)
             except:
                 current_employee_headers = []
             
@@ -391,17 +490,17 @@ class YouPosmHandler:
                     if not all_values or (len(all_values) == 1 and not any(all_values[0])):
                         self.employee_worksheet.clear()
                         self.employee_worksheet.append_row(employee_expected_headers)
-                        st.info("📋 Employee spreadsheet headers configured (new sheet)")
+                        self._notify("info", "📋 Employee spreadsheet headers configured (new sheet)")
                 except:
-                    st.warning("⚠️ Could not verify employee sheet structure")
+                    self._notify("warning", "⚠️ Could not verify employee sheet structure")
             elif current_employee_headers != employee_expected_headers:
-                st.warning("⚠️ Employee sheet headers differ - preserving existing data")
+                self._notify("warning", "⚠️ Employee sheet headers differ - preserving existing data")
             
             # Store sheet headers - SAFE handling  
             store_expected_headers = ['Store_Name']
             
             try:
-                current_store_headers = self.store_worksheet.row_values(1)
+                current_store_headers = _call_sheets(self.store_worksheet.row_values, 1)
             except:
                 current_store_headers = []
             
@@ -412,15 +511,22 @@ class YouPosmHandler:
                     if not all_values or (len(all_values) == 1 and not any(all_values[0])):
                         self.store_worksheet.clear()
                         self.store_worksheet.append_row(store_expected_headers)
-                        st.info("📋 Store spreadsheet headers configured (new sheet)")
+                        self._notify("info", "📋 Store spreadsheet headers configured (new sheet)")
                 except:
-                    st.warning("⚠️ Could not verify store sheet structure")
+                    self._notify("warning", "⚠️ Could not verify store sheet structure")
             elif current_store_headers != store_expected_headers:
-                st.warning("⚠️ Store sheet headers differ - preserving existing data")
+                self._notify("warning", "⚠️ Store sheet headers differ - preserving existing data")
                 
         except Exception as e:
-            st.warning(f"Could not verify spreadsheet structure: {str(e)}")
-            st.info("📌 Continuing without header verification to preserve data")
+            self._notify("warning", f"Could not verify spreadsheet structure: {str(e)}")
+            self._notify("info", "📌 Continuing without header verification to preserve data")
+    
+    def _get_names(self, header: str) -> List[str]:
+        """Cached names of a lookup sheet plus any added since the cache was filled"""
+        spreadsheet = self.main_worksheet.spreadsheet
+        names = _load_lookup_names(spreadsheet, spreadsheet.id, _sheet_version(spreadsheet)).get(header, [])
+        added = self.added_names[header].difference(names)
+        return sorted(added.union(names)) if added else names
     
     def get_employee_data(self) -> Tuple[List[str], List[str]]:
         """Get employee data from the employee sheet and store data from store sheet"""
@@ -431,11 +537,7 @@ class YouPosmHandler:
             # Get employees from Employee Sheet
             employees = []
             if self.employee_worksheet:
-                records = self.employee_worksheet.get_all_records()
-                if records:
-                    df = pd.DataFrame(records)
-                    if 'Employee_Name' in df.columns:
-                        employees = sorted([e for e in df['Employee_Name'].dropna().unique().tolist() if e])
+                employees = self._get_names('Employee_Name')
             
             return stores, employees
             
@@ -449,17 +551,7 @@ class YouPosmHandler:
             if not self.store_worksheet:
                 return []
             
-            records = self.store_worksheet.get_all_records()
-            if not records:
-                return []
-            
-            df = pd.DataFrame(records)
-            
-            if 'Store_Name' in df.columns:
-                stores = sorted([s for s in df['Store_Name'].dropna().unique().tolist() if s])
-                return stores
-            
-            return []
+            return self._get_names('Store_Name')
             
         except Exception as e:
             st.error(f"❌ Error loading stores from Store Sheet: {str(e)}")
@@ -471,138 +563,125 @@ class YouPosmHandler:
             if not self.employee_worksheet:
                 return []
             
-            # Get all records from employee sheet
-            records = self.employee_worksheet.get_all_records()
-            if not records:
-                return []
-            
-            df = pd.DataFrame(records)
-            
             # Return all employees since we don't have store association in employee sheet
-            if 'Employee_Name' in df.columns:
-                employees = sorted([e for e in df['Employee_Name'].dropna().unique().tolist() if e])
-                return employees
-            
-            return []
+            return self._get_names('Employee_Name')
             
         except Exception as e:
             st.error(f"❌ Error loading employees: {str(e)}")
             return []
     
-    def add_store_to_sheet(self, store_name: str) -> bool:
-        """Add new store to Store Sheet"""
-        try:
-            if not self.store_worksheet:
-                return False
-            
-            # Check if store already exists
-            records = self.store_worksheet.get_all_records()
-            for record in records:
-                if record.get('Store_Name', '').strip() == store_name.strip():
-                    return True  # Already exists
-            
-            # Add new store
-            row_data = [store_name.strip()]
-            
-            self.store_worksheet.append_row(row_data)
-            return True
-            
-        except Exception as e:
-            st.error(f"❌ Error adding store: {str(e)}")
-            return False
-    
-    def add_employee_to_sheet(self, store_name: str, employee_name: str) -> bool:
-        """Add new employee to employee sheet"""
+    def add_lookup_names(self, new_names: dict) -> bool:
+        """Add new store/employee names (keyed by LOOKUP_SHEETS header) in one batchUpdate.
+        
+        Names already on their sheet are skipped.
+        """
         try:
-            if not self.employee_worksheet:
+            worksheets = {'Store_Name': self.store_worksheet, 'Employee_Name': self.employee_worksheet}
+            if not all(worksheets[header] for header in new_names):
                 return False
             
-            # Check if employee already exists
-            records = self.employee_worksheet.get_all_records()
-            for record in records:
-                if record.get('Employee_Name', '').strip() == employee_name.strip():
-                    return True  # Already exists
-            
-            # Add new employee (only employee name)
-            row_data = [employee_name.strip()]
+            # Already in the cached lists: nothing to read or write
+            pending = {
+                header: name.strip() for header, name in new_names.items()
+                if name.strip() not in self._get_names(header)
+            }
+            if not pending:
+                return True
+            
+            # Check the rest against a fresh read of their name columns, in one values.batchGet
+            spreadsheet = self.main_worksheet.spreadsheet
+            headers = list(pending)
+            response = _call_sheets(
+                spreadsheet.values_batch_get, [f"'{LOOKUP_SHEETS[header]}'!A2:A" for header in headers]
+            )
+            for header, value_range in zip(headers, response.get("valueRanges", [])):
+                if pending[header] in (row[0].strip() for row in value_range.get("values", []) if row):
+                    del pending[header]  # Already exists
+            if not pending:
+                return True
+            
+            # One AppendCells per sheet, applied atomically in a single request.
+            # stringValue stores names verbatim (like RAW), never as formulas or numbers
+            requests = [
+                {
+                    "appendCells": {
+                        "sheetId": worksheets[header].id,
+                        "rows": [{"values": [{"userEnteredValue": {"stringValue": name}}]}],
+                        "fields": "userEnteredValue"
+                    }
+                }
+                for header, name in pending.items()
+            ]
+            _call_sheets(spreadsheet.batch_update, {"requests": requests}, idempotent=False)
             
-            self.employee_worksheet.append_row(row_data)
+            for header, name in pending.items():
+                self.added_names[header].add(name)
             return True
             
         except Exception as e:
-            st.error(f"❌ Error adding employee: {str(e)}")
+            st.error(f"❌ Error adding store/employee: {str(e)}")
             return False
     
-    def upload_image(self, image: Image.Image, store: str, employee: str, img_type: str) -> Optional[str]:
-        """Upload image to GCS and make it publicly accessible"""
+    def upload_image(self, image_data: bytes, store: str, employee: str, img_type: str,
+                     submitted_at: datetime, submission_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """Decode, downscale and upload image bytes to GCS and make them publicly accessible.
+        
+        The object is named after the submission's timestamp and ID, so a visit's before and
+        after photos differ only by their img_type folder.
+        Returns (public_url, error_message); runs in worker threads so it never calls st.*
+        """
+        from google.api_core.exceptions import BadRequest, NotFound
+        
         try:
             if not self.bucket:
-                st.error("❌ Storage bucket not connected")
-                return None
+                return None, "❌ Storage bucket not connected"
             
             # Clean names for folder structure
-            clean_store = "".join(c for c in store if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
-            clean_employee = "".join(c for c in employee if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+            clean_store = _clean_path_segment(store)
+            clean_employee = _clean_path_segment(employee)
             
             # Generate path
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            timestamp = datetime.now().strftime("%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
-            
-            path = f"you-posm/{clean_store}/{clean_employee}/{date_str}/{img_type}/{timestamp}_{unique_id}.jpg"
+            path = (
+                f"you-posm/{clean_store}/{clean_employee}/{submitted_at:%Y-%m-%d}/{img_type}/"
+                f"{submitted_at:%H%M%S}_{submission_id}.jpg"
+            )
             
             # Optimize image and preserve orientation
-            from PIL import ImageOps
-            
-            # Auto-orient the image based on EXIF data
-            image = ImageOps.exif_transpose(image)
-            
-            if image.mode in ("RGBA", "P"):
-                image = image.convert("RGB")
-            
-            # Resize while maintaining aspect ratio (don't force orientation)
-            if image.width > 1920 or image.height > 1920:
-                # Calculate new dimensions maintaining aspect ratio
-                if image.width > image.height:
-                    # Landscape: limit width
-                    new_width = 1920
-                    new_height = int((1920 * image.height) / image.width)
-                else:
-                    # Portrait: limit height  
-                    new_height = 1920
-                    new_width = int((1920 * image.width) / image.height)
-                
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Upload to GCS
-            img_bytes = io.BytesIO()
-            image.save(img_bytes, format='JPEG', quality=85, optimize=True)
-            img_bytes.seek(0)
+            data = _encode_for_upload(image_data)
             
+            # Single multipart request: the size is known, so skip the resumable
+            # session, and set the public-read ACL in the same call instead of a
+            # separate make_public() PATCH. if_generation_match=0 never overwrites.
+            # Integrity is checked with CRC32C (SSE4.2 via google-crc32c), not MD5.
             blob = self.bucket.blob(path)
-            blob.upload_from_file(img_bytes, content_type='image/jpeg')
-            
-            # Make the blob publicly readable
+            # An hour of edge/browser caching; kept short so a deleted photo stops
+            # being served soon after. Sent as metadata in the same upload request
+            blob.cache_control = 'public, max-age=3600'
             try:
-                blob.make_public()
-                st.success(f"✅ Image uploaded and made public: {path}")
-            except Exception as e:
-                st.warning(f"⚠️ Image uploaded but could not make public: {str(e)}")
-                # Try alternative: set public read ACL
-                try:
-                    blob.acl.all().grant_read()
-                    blob.acl.save()
-                    st.success(f"✅ Image made public via ACL: {path}")
-                except Exception as e2:
-                    st.warning(f"⚠️ ACL method also failed: {str(e2)}")
+                blob.upload_from_string(
+                    data,
+                    content_type='image/jpeg',
+                    predefined_acl='publicRead' if self.object_acls_enabled else None,
+                    if_generation_match=0,
+                    checksum='crc32c'
+                )
+            except BadRequest as e:
+                if not self.object_acls_enabled or 'uniform bucket-level access' not in str(e).lower():
+                    raise
+                # Bucket uses uniform access: public read comes from bucket IAM, not object ACLs
+                self.object_acls_enabled = False
+                blob.upload_from_string(data, content_type='image/jpeg', if_generation_match=0, checksum='crc32c')
             
             # Return public URL
             public_url = f"https://storage.googleapis.com/{self.bucket.name}/{path}"
-            return public_url
+            return public_url, None
             
+        except NotFound:
+            # New objects can't 404, so the bucket itself is missing
+            self.connection_status["storage"] = False
+            return None, f"❌ Storage bucket '{self.bucket.name}' not found"
         except Exception as e:
-            st.error(f"❌ Image upload failed: {str(e)}")
-            return None
+            return None, f"❌ {img_type.capitalize()} image upload failed: {str(e)}"
     
     def save_data(self, data: dict) -> bool:
         """Save data to main spreadsheet (Sheet1)"""
@@ -613,45 +692,62 @@ class YouPosmHandler:
             
             # Prepare row data matching main spreadsheet structure
             row_data = [
-                data['store_name'],           # Store_Name
-                data['employee_name'],        # Employee_Name  
+                _as_text(data['store_name']),     # Store_Name
+                _as_text(data['employee_name']),  # Employee_Name  
                 data['date'],                 # Date
                 data['before_image_url'],     # Before_Image_URL
                 data['after_image_url'],      # After_Image_URL
                 data['timestamp'],            # Timestamp
                 data['status'],               # Status - can be 'visited' or 'Out Of Stock'
-                data.get('notes', '')         # Notes - additional information
+                _as_text(data.get('notes', ''))  # Notes - additional information
             ]
             
-            self.main_worksheet.append_row(row_data)
+            # Single values.append call - no header lookup or extra round-trips.
+            # USER_ENTERED keeps Date/Timestamp as real dates; table_range pins
+            # the append to the table starting at A1.
+            _call_sheets(
+                self.main_worksheet.append_rows,
+                [row_data],
+                value_input_option='USER_ENTERED',
+                insert_data_option='INSERT_ROWS',
+                table_range='A1',
+                idempotent=False
+            )
             return True
             
         except Exception as e:
             st.error(f"❌ Data save failed: {str(e)}")
             return False
 
+@st.cache_resource(show_spinner="🔧 Initializing connections...")
+def get_handler() -> YouPosmHandler:
+    """One YouPosmHandler (secrets, clients, worksheets) shared by all sessions"""
+    return YouPosmHandler()
+
 def main():
     # Clean header
-    st.markdown("""
-    <div class="main-header">
-        <h1>📊 MINISO POSM Data Collection</h1>
-        <p>Store Data Collection System</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Initialize handler
-    if 'handler' not in st.session_state:
-        with st.spinner("🔧 Initializing connections..."):
-            st.session_state.handler = YouPosmHandler()
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
+    
+    # Shared handler (built once per process)
+    handler = get_handler()
+    connected = handler.connection_status["sheets"] and handler.connection_status["storage"]
+    
+    # Show setup messages once per session (and on every failed attempt)
+    if not connected or not st.session_state.get('setup_messages_shown'):
+        for level, message in handler.setup_messages:
+            getattr(st, level)(message)
+        st.session_state.setup_messages_shown = True
     
     # Connection status (compact)
-    if st.session_state.handler.connection_status["sheets"] and st.session_state.handler.connection_status["storage"]:
+    if connected:
         st.markdown('<div class="status-badge status-connected">✅ System Ready</div>', unsafe_allow_html=True)
     else:
         st.markdown('<div class="status-badge status-error">❌ Connection Error</div>', unsafe_allow_html=True)
     
     # Check if properly configured
-    if not (st.session_state.handler.connection_status["sheets"] and st.session_state.handler.connection_status["storage"]):
+    if not connected:
+        # Don't keep a broken handler cached - retry setup on the next run
+        get_handler.clear()
         st.error("""
         ❌ **Configuration Required**
         
@@ -670,7 +766,7 @@ def main():
     
     # Get employee and store data from respective sheets
     with st.spinner("📊 Loading store and employee data..."):
-        stores, all_employees = st.session_state.handler.get_employee_data()
+        stores, all_employees = handler.get_employee_data()
     
     # Main data collection form
     st.markdown('<div class="form-title">➕ Add New Entry</div>', unsafe_allow_html=True)
@@ -719,8 +815,11 @@ def main():
                 type=['png', 'jpg', 'jpeg'],
                 key="before_img"
             )
-            if before_image:
-                st.image(before_image, use_container_width=True)
+            # Read the upload once; the same bytes feed the preview and the decode on submit
+            before_bytes = before_image.getvalue() if before_image else None
+            if before_bytes:
+                # Downscaled copy: the browser doesn't need the full photo for a preview
+                st.image(_preview_image(before_bytes, before_image.file_id), use_container_width=True)
         
         with col2:
             st.markdown("**After**")
@@ -729,8 +828,11 @@ def main():
                 type=['png', 'jpg', 'jpeg'],
                 key="after_img"
             )
-            if after_image:
-                st.image(after_image, use_container_width=True)
+            # Read the upload once; the same bytes feed the preview and the decode on submit
+            after_bytes = after_image.getvalue() if after_image else None
+            if after_bytes:
+                # Downscaled copy: the browser doesn't need the full photo for a preview
+                st.image(_preview_image(after_bytes, after_image.file_id), use_container_width=True)
 
         # Product Stock Status Checkboxes
         st.markdown('<div class="checkbox-container">', unsafe_allow_html=True)
@@ -761,53 +863,43 @@ def main():
         submitted = st.form_submit_button("💾 Submit Entry", type="primary")
         
         if submitted:
-            # Validation
-            errors = []
-            if not store_name.strip():
-                errors.append("Store name is required")
-            if not employee_name.strip():
-                errors.append("Employee name is required")
-            if not before_image:
-                errors.append("Before image is required")
-            if not after_image:
-                errors.append("After image is required")
+            # Validation - (failed, message) per required field
+            checks = [
+                (not store_name.strip(), "Store name is required"),
+                (not employee_name.strip(), "Employee name is required"),
+                (not before_image, "Before image is required"),
+                (not after_image, "After image is required"),
+            ]
+            errors = [message for failed, message in checks if failed]
             
             if errors:
-                st.markdown(f"""
-                <div class="message-box error-box">
-                    <strong>❌ Please complete:</strong><br>
-                    • {('<br>• ').join(errors)}
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(ERROR_BOX_HTML.format(items='<br>• '.join(errors)), unsafe_allow_html=True)
             else:
                 # Process submission - ALL submissions have status "Visited"
                 with st.spinner("📤 Uploading entry..."):
                     try:
-                        # Step 1: Process images
-                        before_img = Image.open(before_image)
-                        after_img = Image.open(after_image)
-                        
-                        # Step 2: Handle new store
+                        # Step 1: Add a new store and/or employee to their sheets (one request)
+                        new_names = {}
                         if store_selection == "+ New Store":
-                            success = st.session_state.handler.add_store_to_sheet(store_name)
-                            if not success:
-                                st.error("❌ Failed to add store to Store Sheet")
-                                st.stop()
-                        
-                        # Step 3: Handle new employee
+                            new_names['Store_Name'] = store_name
                         if employee_selection == "+ New Employee":
-                            success = st.session_state.handler.add_employee_to_sheet(store_name, employee_name)
-                            if not success:
-                                st.error("❌ Failed to add employee to employee sheet")
-                                st.stop()
+                            new_names['Employee_Name'] = employee_name
+                        if new_names and not handler.add_lookup_names(new_names):
+                            st.error("❌ Failed to add new store/employee to the lookup sheets")
+                            st.stop()
                         
-                        # Step 4: Upload images
-                        before_url = st.session_state.handler.upload_image(
-                            before_img, store_name, employee_name, "before"
-                        )
-                        after_url = st.session_state.handler.upload_image(
-                            after_img, store_name, employee_name, "after"
+                        # Step 2: Upload images (both at once - each is an independent GCS PUT)
+                        # One timestamp and ID per submission: the pair share a file name and
+                        # the sheet row records the same time
+                        submitted_at = datetime.now()
+                        submission_id = secrets.token_hex(8)
+                        (before_url, before_error), (after_url, after_error) = _run_concurrently(
+                            (handler.upload_image, before_bytes, store_name, employee_name, "before", submitted_at, submission_id),
+                            (handler.upload_image, after_bytes, store_name, employee_name, "after", submitted_at, submission_id)
                         )
+                        for upload_error in (before_error, after_error):
+                            if upload_error:
+                                st.error(upload_error)
                         
                         if before_url and after_url:
                             # Generate notes based on product stock status
@@ -845,16 +937,17 @@ def main():
                             data = {
                                 'store_name': store_name.strip(),
                                 'employee_name': employee_name.strip(),
-                                'date': entry_date.strftime("%Y-%m-%d"),
+                                'date': entry_date.isoformat(),
                                 'before_image_url': before_url,
                                 'after_image_url': after_url,
-                                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                # Same clock read as the photo names, so their HHMMSS match
+                                'timestamp': submitted_at.isoformat(sep=' ', timespec='seconds'),
                                 'status': 'Visited',  # Always "Visited"
                                 'notes': final_notes
                             }
                             
                             # Save to spreadsheet
-                            if st.session_state.handler.save_data(data):
+                            if handler.save_data(data):
                                 # Success message based on stock status
                                 if len(out_of_stock_products) == 4:
                                     success_msg = "✅ All Products Out of Stock - Visit Recorded!"
@@ -866,12 +959,10 @@ def main():
                                     success_msg = "✅ All Products Available - Visit Recorded!"
                                     detail_msg = 'Entry saved with status "Visited". All products available.'
                                 
-                                st.markdown(f"""
-                                <div class="message-box success-box">
-                                    <strong>{success_msg}</strong><br>
-                                    {detail_msg}
-                                </div>
-                                """, unsafe_allow_html=True)
+                                st.markdown(
+                                    SUCCESS_BOX_HTML.format(message=success_msg, detail=detail_msg),
+                                    unsafe_allow_html=True
+                                )
                                 st.balloons()
                                 
                                 # Show uploaded images
@@ -886,10 +977,6 @@ def main():
                                 st.markdown("**📊 Saved Data:**")
                                 st.write(f"- **Status:** Visited")
                                 st.write(f"- **Notes:** {final_notes if final_notes else 'None'}")
-                                
-                                # Auto-refresh in 3 seconds
-                                time.sleep(2)
-                                st.rerun()
                             else:
                                 st.error("❌ Failed to save data to spreadsheet")
                         else:
@@ -5,8 +5,12 @@ Run this to identify all configuration issues at once
 """
 
 import os
+import io
 import json
+import socket
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def print_section(title):
@@ -79,11 +83,18 @@ def check_secret_manager():
                 "youposm-spreadsheet-id"
             ]
             
-            for secret_name in secrets_to_test:
+            def access(secret_name):
+                name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
+                response = client.access_secret_version(request={"name": name})
+                return response.payload.data.decode("UTF-8")
+            
+            # Fetch all three at once on the shared client; report them in order
+            with ThreadPoolExecutor(max_workers=len(secrets_to_test)) as executor:
+                lookups = [executor.submit(access, secret_name) for secret_name in secrets_to_test]
+            
+            for secret_name, lookup in zip(secrets_to_test, lookups):
                 try:
-                    name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-                    response = client.access_secret_version(request={"name": name})
-                    value = response.payload.data.decode("UTF-8")
+                    value = lookup.result()
                     
                     if secret_name == "youposm-google-credentials":
                         try:
@@ -202,15 +213,13 @@ def check_sheets_access():
                     try:
                         # Try to add a test row and then delete it
                         test_row = ["TEST", "TEST", "TEST", "TEST", "TEST", "TEST", "TEST"]
-                        worksheet.append_row(test_row)
+                        response = worksheet.append_row(test_row)
                         
-                        # Get last row and delete it
-                        all_values = worksheet.get_all_values()
-                        if all_values and all_values[-1][0] == "TEST":
-                            worksheet.delete_rows(len(all_values))
-                            print("✅ Write permissions work")
-                        else:
-                            print("⚠️  Write test inconclusive")
+                        # Delete the row the append response says it wrote
+                        updated_range = response["updates"]["updatedRange"]
+                        test_row_number, _ = gspread.utils.a1_to_rowcol(updated_range.rsplit("!", 1)[-1].split(":")[0])
+                        worksheet.delete_rows(test_row_number)
+                        print("✅ Write permissions work")
                             
                     except Exception as e:
                         print(f"❌ Write test failed: {str(e)}")
@@ -226,6 +235,20 @@ def check_sheets_access():
     except ImportError as e:
         print(f"❌ Sheets libraries not available: {str(e)}")
 
+def resolves(host, timeout):
+    """Whether host resolves within timeout seconds (getaddrinfo ignores socket timeouts)"""
+    resolved = threading.Event()
+    
+    def lookup():
+        try:
+            socket.getaddrinfo(host, 80)
+            resolved.set()
+        except OSError:
+            pass
+    
+    threading.Thread(target=lookup, daemon=True).start()
+    return resolved.wait(timeout)
+
 def check_cloud_run_metadata():
     print_section("CLOUD RUN METADATA")
     
@@ -238,13 +261,18 @@ def check_cloud_run_metadata():
     else:
         print("❌ Not running in Cloud Run (local environment)")
     
+    # Off GCP the name doesn't resolve, and the OS resolver can retry for seconds
+    if not resolves('metadata.google.internal', timeout=0.5):
+        print("❌ Metadata server not resolvable (not on GCP)")
+        return
+    
     # Check metadata server access
     try:
         import requests
         response = requests.get(
             'http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/token',
             headers={'Metadata-Flavor': 'Google'},
-            timeout=5
+            timeout=(1, 2)
         )
         if response.status_code == 200:
             print("✅ Metadata server accessible")
@@ -253,16 +281,56 @@ def check_cloud_run_metadata():
     except Exception as e:
         print(f"❌ Cannot access metadata server: {str(e)}")
 
+class ThreadOutput:
+    """sys.stdout stand-in that sends each worker thread's prints to its own buffer"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def _target(self):
+        return getattr(self.local, 'buffer', None) or self.stream
+    
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def capture(self, check):
+        """Run a check in the current thread and return everything it printed"""
+        self.local.buffer = io.StringIO()
+        try:
+            check()
+            return self.local.buffer.getvalue()
+        finally:
+            self.local.buffer = None
+
+def run_network_checks(checks):
+    """Run checks that talk to different endpoints at once, printing their sections in order"""
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            sections = list(executor.map(output.capture, checks))
+    finally:
+        sys.stdout = output.stream
+    
+    for section in sections:
+        print(section, end='')
+
 def main():
     print("🔍 You-POSM Diagnostic Tool")
     print("This will check all aspects of your GCP configuration")
     
     check_environment()
     check_credential_files()
-    check_cloud_run_metadata()
-    check_secret_manager()
-    check_gcs_access()
-    check_sheets_access()
+    run_network_checks([
+        check_cloud_run_metadata,
+        check_secret_manager,
+        check_gcs_access,
+        check_sheets_access
+    ])
     
     print_section("SUMMARY & RECOMMENDATIONS")
     print("If you see any ❌ above, those need to be fixed before deployment.")
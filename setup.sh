@@ -29,7 +29,7 @@ uv init --no-readme
 
 # Install dependencies
 echo "📦 Installing dependencies..."
-uv add streamlit pandas gspread google-auth google-cloud-storage pillow python-dotenv
+uv add streamlit gspread google-auth google-cloud-storage pillow python-dotenv
 
 # Install dev dependencies
 echo "🛠️  Installing dev dependencies..."
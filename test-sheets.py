@@ -47,14 +47,14 @@ try:
             # Test write access by adding and removing a test row
             try:
                 test_row = ["TEST", "TEST", "TEST", "TEST", "TEST", "TEST", "TEST"]
-                spreadsheet.sheet1.append_row(test_row)
+                response = spreadsheet.sheet1.append_row(test_row)
                 print("✅ Write access: SUCCESS")
                 
-                # Remove the test row
-                all_values = spreadsheet.sheet1.get_all_values()
-                if all_values and len(all_values) > 1 and all_values[-1][0] == "TEST":
-                    spreadsheet.sheet1.delete_rows(len(all_values))
-                    print("✅ Test row cleaned up")
+                # Remove the test row (the append response says where it landed)
+                updated_range = response["updates"]["updatedRange"]
+                test_row_number, _ = gspread.utils.a1_to_rowcol(updated_range.rsplit("!", 1)[-1].split(":")[0])
+                spreadsheet.sheet1.delete_rows(test_row_number)
+                print("✅ Test row cleaned up")
                     
             except Exception as e:
                 print(f"❌ Write access FAILED: {str(e)}")